@@ -0,0 +1,22 @@
+"""
+Gunicorn settings (loaded automatically when gunicorn starts in this directory).
+
+/run spends nearly all of its time waiting on OpenAI and S3, so workers are
+gevent by default: the worker monkey-patches sockets before importing the
+app, and one process multiplexes many in-flight OpenAI/S3 calls.
+GUNICORN_WORKER_CLASS=gthread switches back to the thread-pool worker.
+Command-line flags still override anything set here.
+
+Async /run jobs and batch records are kept in Redis when REDIS_URL is set.
+Without it they live in one worker's memory, so the default drops to a
+single worker; with WEB_CONCURRENCY > 1 and no Redis the app refuses
+/run?async=1 and the batch routes instead of handing out status URLs that
+another worker can't answer.
+"""
+import os
+
+_HAS_REDIS = bool((os.environ.get("REDIS_URL") or "").strip())
+workers = int(os.environ.get("WEB_CONCURRENCY", "2" if _HAS_REDIS else "1"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))  # gevent
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))  # gthread
@@ -1,14 +1,23 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
+from flask.json.provider import DefaultJSONProvider
+import io
 import os
-import uuid
+import gzip
+import secrets
 import json
 import re
 import time
 import math
-from typing import Dict, Any, Optional, List, Tuple
+import functools
+import hashlib
+import heapq
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Union, BinaryIO, Sequence, Callable
 
-from openai import OpenAI
-import boto3
+import orjson
+import redis
 
 # ReportLab imports
 from reportlab.lib.pagesizes import letter
@@ -29,97 +38,508 @@ from reportlab.lib.units import inch
 from reportlab.graphics.shapes import Drawing, String, Rect
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 
+
+# ---------- JSON (orjson) ----------
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Routes jsonify() and request.get_json() through orjson.
+    Mirrors Flask's defaults: sorted keys, indent when Flask asks for it.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# ---------- Response compression ----------
+GZIP_MIN_BYTES = 500  # below this the gzip header costs more than it saves
+
+
+@app.after_request
+def gzip_json_response(response: Response) -> Response:
+    if (
+        response.mimetype != "application/json"
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "gzip" not in request.headers.get("Accept-Encoding", "").lower()
+    ):
+        return response
+    data = response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
 
 # ---------- OpenAI ----------
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+OPENAI_MODEL = "gpt-4.1-mini"
+# The model only polishes quick_snapshot, and /run falls back to the rule-based
+# bullets on error, so a slow call is cut off rather than waited out.
+OPENAI_TIMEOUT_SECONDS = float(os.environ.get("OPENAI_TIMEOUT_SECONDS", "20"))
+
+
+# openai and boto3 are imported on first use: together they are ~1s of
+# import + client setup, which otherwise delays every worker boot and the
+# healthcheck. lru_cache makes each client a per-process singleton.
+@functools.lru_cache(maxsize=1)
+def get_openai_client():
+    from openai import OpenAI, Timeout
+
+    # One client per process keeps the SDK's pooled keep-alive connections.
+    return OpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        timeout=Timeout(OPENAI_TIMEOUT_SECONDS, connect=3.0),
+        max_retries=1,
+    )
+
 
 # ---------- S3 CONFIG ----------
 S3_BUCKET = os.environ.get("S3_BUCKET_NAME")
 S3_REGION = os.environ.get("S3_REGION", "us-east-2")
-s3_client = boto3.client("s3", region_name=S3_REGION)
+# Optional CDN (e.g. CloudFront) in front of the bucket; pdf_url uses it when set.
+S3_PUBLIC_BASE_URL = os.environ.get("S3_PUBLIC_BASE_URL", "").rstrip("/")
+S3_MAX_POOL_CONNECTIONS = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", "50"))
+# PDFs below this go up as a single PUT; larger ones use a multipart transfer.
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=1)
+def get_s3_client():
+    import boto3
+    from botocore.config import Config as BotoConfig
+
+    return boto3.client(
+        "s3",
+        region_name=S3_REGION,
+        config=BotoConfig(
+            max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+            retries={"mode": "adaptive", "max_attempts": 3},
+            tcp_keepalive=True,
+            # same bucket.s3.region host the public pdf_url uses, no redirect
+            s3={"addressing_style": "virtual"},
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _s3_transfer_config():
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        max_concurrency=8,
+        use_threads=True,
+    )
+
+
+# ---------- PDF rendering processes (opt-in) ----------
+# doc.build is CPU-bound and holds the GIL (and, under gevent, the hub) while
+# it runs. PDF_PROCESS_WORKERS > 0 renders in a process pool instead; 0 keeps
+# rendering in the request thread.
+PDF_PROCESS_WORKERS = int(os.environ.get("PDF_PROCESS_WORKERS", "0"))
+# A wedged or crashed renderer fails the request instead of hanging it.
+PDF_RENDER_TIMEOUT_SECONDS = float(os.environ.get("PDF_RENDER_TIMEOUT_SECONDS", "60"))
+
+
+@functools.lru_cache(maxsize=1)
+def _pdf_process_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: gunicorn workers already run threads (and maybe gevent)
+    return ProcessPoolExecutor(
+        max_workers=PDF_PROCESS_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
 
 # ---------- CTA / CALENDAR ----------
 DEFAULT_CALENDAR_URL = "https://api.leadconnectorhq.com/widget/bookings/automation-strategy-call-1"
 CALENDAR_URL = (os.environ.get("CALENDAR_URL", "") or "").strip() or DEFAULT_CALENDAR_URL
 
-# ---------- Context store (in-memory) ----------
+# ---------- Context store (Redis when REDIS_URL is set, else in-memory) ----------
 CONTEXT_TTL_SECONDS = int(os.environ.get("CONTEXT_TTL_SECONDS", "86400"))  # 24h default
+REDIS_URL = (os.environ.get("REDIS_URL", "") or "").strip()
+# Redis shares context across gunicorn workers and survives redeploys;
+# the in-memory dict below is the single-process fallback.
+redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True) if REDIS_URL else None
+CONTEXT_MAX_ITEMS = int(os.environ.get("CONTEXT_MAX_ITEMS", "100000"))
 _CONTEXT_BY_PHONE: Dict[str, Dict[str, Any]] = {}
-
+_CONTEXT_EXPIRY_HEAP: List[Tuple[float, str]] = []  # (expires_at, phone key)
+# Every read-modify-write of the dict/heap holds this; worker threads share them.
+_CONTEXT_LOCK = threading.RLock()
+
+# ---------- Result cache (duplicate submissions / webhook retries) ----------
+# Redis when REDIS_URL is set (shared by all workers), else this process only.
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get("RESULT_CACHE_TTL_SECONDS", "3600"))  # 1h default
+RESULT_CACHE_MAX_ITEMS = int(os.environ.get("RESULT_CACHE_MAX_ITEMS", "512"))
+_RESULT_CACHE: Dict[str, Dict[str, Any]] = {}
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+# ---------- Batch jobs (OpenAI Batch API, see /run_batch) ----------
+BATCH_JOB_TTL_SECONDS = int(os.environ.get("BATCH_JOB_TTL_SECONDS", str(3 * 86400)))  # 3 days
+BATCH_PUBLISH_WORKERS = int(os.environ.get("BATCH_PUBLISH_WORKERS", "4"))
+# Like async jobs below: without REDIS_URL a batch is only known to the
+# worker that submitted it.
+BATCH_JOB_MAX_ITEMS = int(os.environ.get("BATCH_JOB_MAX_ITEMS", "200"))
+_BATCH_JOBS: Dict[str, Dict[str, Any]] = {}
+# One publisher per finished batch; the Redis claim expires so a worker
+# killed mid-publish doesn't wedge the batch.
+BATCH_PUBLISH_CLAIM_SECONDS = int(os.environ.get("BATCH_PUBLISH_CLAIM_SECONDS", "3600"))
+# A batch that keeps failing to publish is marked "failed" after this many tries.
+BATCH_PUBLISH_MAX_ATTEMPTS = int(os.environ.get("BATCH_PUBLISH_MAX_ATTEMPTS", "3"))
+_BATCH_CLAIMS: set = set()
+# Each worker re-checks unfinished batches this often, so fire-and-forget
+# submits (/run?mode=batch) get published without anyone polling. 0 = off.
+BATCH_POLL_SECONDS = int(os.environ.get("BATCH_POLL_SECONDS", "60"))
+_BATCH_DONE_STATUSES = frozenset({"failed", "expired", "cancelled"})
+_PENDING_BATCHES_KEY = "batch:pending"
+
+# ---------- Async /run jobs (POST /run?async=1, poll /status/<job_id>) ----------
+RUN_JOB_TTL_SECONDS = int(os.environ.get("RUN_JOB_TTL_SECONDS", "86400"))  # 24h default
+RUN_JOB_WORKERS = int(os.environ.get("RUN_JOB_WORKERS", "4"))
+run_job_executor = ThreadPoolExecutor(max_workers=RUN_JOB_WORKERS, thread_name_prefix="apex-job")
+RUN_JOB_MAX_ITEMS = int(os.environ.get("RUN_JOB_MAX_ITEMS", "1000"))
+_RUN_JOBS: Dict[str, Dict[str, Any]] = {}
+# Without REDIS_URL job and batch records live in this process only, so with
+# several workers (gunicorn.conf.py reads the same WEB_CONCURRENCY) a status
+# poll could land on a worker that never saw the job.
+JOB_STATE_NOT_SHARED = redis_client is None and int(os.environ.get("WEB_CONCURRENCY", "1")) > 1
+# Guards the in-process batch/job dicts; worker threads write them.
+_RECORDS_LOCK = threading.Lock()
 
 # --------------------------------------------------------------------
 # HELPERS
 # --------------------------------------------------------------------
+_NULLISH_VALUES = frozenset({"null", "none", "n/a", "na"})
+_PLACEHOLDER_VALUES = frozenset({"--", "—", "-", "•", "• --"})
+_RE_NON_DIGIT = re.compile(r"\D+")
+_RE_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
 def clean_value(v: object) -> str:
-    if v is None:
-        return ""
-    s = str(v).strip()
-    if s.lower() in {"null", "none", "n/a", "na"}:
+    if v is None or v == "":
         return ""
-    if s.strip() in {"--", "—", "-", "•", "• --"}:
+    s = (v if isinstance(v, str) else str(v)).strip()
+    # every sentinel is at most 4 chars, so longer text skips the lower() copy
+    if len(s) <= 4 and (s.lower() in _NULLISH_VALUES or s in _PLACEHOLDER_VALUES):
         return ""
     return s
 
 
 def normalize_phone(phone: str) -> str:
     p = clean_value(phone)
-    digits = re.sub(r"\D+", "", p)
+    digits = _RE_NON_DIGIT.sub("", p)
     if len(digits) == 10:
         digits = "1" + digits
     return digits
 
 
 def to_e164(phone_digits: str) -> str:
-    d = re.sub(r"\D+", "", phone_digits or "")
+    d = _RE_NON_DIGIT.sub("", phone_digits or "")
     if not d:
         return ""
     return f"+{d}"
 
 
 def cleanup_context_store() -> None:
+    """
+    Pops due entries off the expiry heap, so a call with nothing expired is
+    O(1). A re-stored phone leaves its old heap entry behind; it no longer
+    matches the stored expiry and is just dropped.
+    """
     now = time.time()
-    expired = [k for k, v in _CONTEXT_BY_PHONE.items() if v.get("expires_at", 0) <= now]
-    for k in expired:
-        _CONTEXT_BY_PHONE.pop(k, None)
+    with _CONTEXT_LOCK:
+        while _CONTEXT_EXPIRY_HEAP and _CONTEXT_EXPIRY_HEAP[0][0] <= now:
+            expires_at, key = heapq.heappop(_CONTEXT_EXPIRY_HEAP)
+            item = _CONTEXT_BY_PHONE.get(key)
+            if item is not None and item["expires_at"] == expires_at:
+                del _CONTEXT_BY_PHONE[key]
 
 
-def store_context_for_phone(phone: str, context: Dict[str, Any]) -> None:
-    cleanup_context_store()
-    key = normalize_phone(phone)
+def _context_redis_key(phone_key: str) -> str:
+    return f"ctx:{phone_key}"
+
+
+def store_context_for_digits(key: str, context: Dict[str, Any]) -> None:
+    """
+    Stores the context under a phone already run through normalize_phone
+    (/run has it from parsing the submission).
+    """
     if not key:
         return
-    _CONTEXT_BY_PHONE[key] = {**context, "expires_at": time.time() + CONTEXT_TTL_SECONDS}
+    if redis_client is not None:
+        # /run calls this after the PDF is published; a Redis outage must not
+        # turn that into a 500, it only costs the later context lookup
+        try:
+            redis_client.set(_context_redis_key(key), json.dumps(context), ex=CONTEXT_TTL_SECONDS)
+        except redis.RedisError:
+            pass
+        return
+    cleanup_context_store()
+    expires_at = time.time() + CONTEXT_TTL_SECONDS
+    with _CONTEXT_LOCK:
+        _CONTEXT_BY_PHONE.pop(key, None)
+        _CONTEXT_BY_PHONE[key] = {**context, "expires_at": expires_at}
+        heapq.heappush(_CONTEXT_EXPIRY_HEAP, (expires_at, key))
+        # dicts keep insertion order, so the first key is the oldest write;
+        # its heap entry is skipped later since the key is gone
+        while len(_CONTEXT_BY_PHONE) > CONTEXT_MAX_ITEMS:
+            _CONTEXT_BY_PHONE.pop(next(iter(_CONTEXT_BY_PHONE)))
 
 
 def get_context_for_phone(phone: str) -> Optional[Dict[str, Any]]:
-    cleanup_context_store()
     key = normalize_phone(phone)
     if not key:
         return None
+    if redis_client is not None:
+        raw = redis_client.get(_context_redis_key(key))
+        return json.loads(raw) if raw else None
+    # Expiry is checked lazily per key; the heap sweep runs on writes.
     item = _CONTEXT_BY_PHONE.get(key)
-    if not item:
+    if not item or item["expires_at"] <= time.time():
         return None
     out = dict(item)
     out.pop("expires_at", None)
     return out
 
 
+# PDF keys are a hash of the PDF bytes, so an object never changes and
+# viewers and CDN edges can keep a copy for good.
+PDF_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_RE_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9 _.-]+")
+
+
+def pdf_download_name(business_name: str) -> str:
+    name = " ".join(_RE_UNSAFE_FILENAME.sub("", business_name or "").split()).strip(".")
+    return f"{name or 'blueprint'}.pdf"
+
+
+def pdf_public_url(s3_key: str) -> str:
+    if S3_PUBLIC_BASE_URL:
+        return f"{S3_PUBLIC_BASE_URL}/{s3_key}"
+    return f"https://{S3_BUCKET}.s3.{S3_REGION}.amazonaws.com/{s3_key}"
+
+
+def pdf_content_key(pdf_bytes: bytes) -> str:
+    return f"blueprints/business_blueprint_{hashlib.blake2b(pdf_bytes, digest_size=12).hexdigest()}.pdf"
+
+
+def upload_pdf_to_s3(pdf_bytes: bytes, s3_key: str, download_name: str = "blueprint.pdf") -> None:
+    """
+    Small PDFs go up in one put_object (no transfer thread pool to spin up);
+    anything past the multipart threshold uses the managed, parallel transfer.
+    """
+    extra_args = {
+        "ContentType": "application/pdf",
+        "ACL": "public-read",
+        "CacheControl": PDF_CACHE_CONTROL,
+        "ContentDisposition": f'inline; filename="{download_name}"',
+    }
+    if len(pdf_bytes) < S3_MULTIPART_THRESHOLD:
+        get_s3_client().put_object(Bucket=S3_BUCKET, Key=s3_key, Body=pdf_bytes, **extra_args)
+        return
+    get_s3_client().upload_fileobj(
+        Fileobj=io.BytesIO(pdf_bytes),
+        Bucket=S3_BUCKET,
+        Key=s3_key,
+        ExtraArgs=extra_args,
+        Config=_s3_transfer_config(),
+    )
+
+
+def _store_record(prefix: str, record_id: str, record: Dict[str, Any], ttl_seconds: int,
+                  local: Dict[str, Dict[str, Any]], max_items: Optional[int] = None,
+                  can_evict: Optional[Callable[[Dict[str, Any]], bool]] = None) -> None:
+    """
+    Batch/job bookkeeping: Redis when configured (visible to every worker),
+    else the given in-process dict, capped at max_items. Past the cap the
+    oldest records that can_evict allows are dropped; the rest are kept.
+    """
+    if redis_client is not None:
+        redis_client.set(f"{prefix}:{record_id}", json.dumps(record), ex=ttl_seconds)
+        return
+    with _RECORDS_LOCK:
+        local.pop(record_id, None)
+        local[record_id] = {**record, "expires_at": time.time() + ttl_seconds}
+        excess = len(local) - max_items if max_items is not None else 0
+        if excess > 0:
+            # dicts keep insertion order, so this walks oldest writes first
+            victims = [
+                k for k, v in local.items()
+                if k != record_id and (can_evict is None or can_evict(v))
+            ][:excess]
+            for k in victims:
+                local.pop(k)
+
+
+def _get_record(prefix: str, record_id: str, local: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if redis_client is not None:
+        raw = redis_client.get(f"{prefix}:{record_id}")
+        return json.loads(raw) if raw else None
+    item = local.get(record_id)
+    if not item or item.get("expires_at", 0) <= time.time():
+        with _RECORDS_LOCK:
+            if local.get(record_id) is item:
+                local.pop(record_id, None)
+        return None
+    out = dict(item)
+    out.pop("expires_at", None)
+    return out
+
+
+def store_batch_job(batch_id: str, job: Dict[str, Any]) -> None:
+    # an unpublished batch is paid-for work, so only finished ones are evicted
+    _store_record("batch", batch_id, job, BATCH_JOB_TTL_SECONDS, _BATCH_JOBS, BATCH_JOB_MAX_ITEMS,
+                  can_evict=lambda record: not _batch_is_pending(record))
+    # Redis keeps the poller's work list as a set; the local dict is scanned
+    if redis_client is not None:
+        if _batch_is_pending(job):
+            redis_client.sadd(_PENDING_BATCHES_KEY, batch_id)
+        else:
+            redis_client.srem(_PENDING_BATCHES_KEY, batch_id)
+
+
+def get_batch_job(batch_id: str) -> Optional[Dict[str, Any]]:
+    return _get_record("batch", batch_id, _BATCH_JOBS)
+
+
+def _batch_is_pending(job: Dict[str, Any]) -> bool:
+    return job.get("results") is None and job.get("status") not in _BATCH_DONE_STATUSES
+
+
+def pending_batch_ids() -> List[str]:
+    """
+    Batches still waiting on OpenAI or on publishing. May include expired
+    records; get_batch_job returns None for those.
+    """
+    if redis_client is not None:
+        return list(redis_client.smembers(_PENDING_BATCHES_KEY))
+    with _RECORDS_LOCK:
+        return [batch_id for batch_id, job in _BATCH_JOBS.items() if _batch_is_pending(job)]
+
+
+def batch_store_full() -> bool:
+    """
+    The in-process store never evicts pending batches, so new ones are
+    refused once BATCH_JOB_MAX_ITEMS of them are waiting.
+    """
+    return redis_client is None and len(pending_batch_ids()) >= BATCH_JOB_MAX_ITEMS
+
+
+def forget_pending_batch(batch_id: str) -> None:
+    if redis_client is not None:
+        redis_client.srem(_PENDING_BATCHES_KEY, batch_id)
+
+
+def claim_batch_publish(batch_id: str) -> bool:
+    """
+    True for exactly one caller per batch (across workers with Redis) until
+    release_batch_publish, so its PDFs are rendered and uploaded once.
+    """
+    if redis_client is not None:
+        return bool(redis_client.set(f"batch-claim:{batch_id}", "1", nx=True, ex=BATCH_PUBLISH_CLAIM_SECONDS))
+    with _RECORDS_LOCK:
+        if batch_id in _BATCH_CLAIMS:
+            return False
+        _BATCH_CLAIMS.add(batch_id)
+        return True
+
+
+def release_batch_publish(batch_id: str) -> None:
+    if redis_client is not None:
+        redis_client.delete(f"batch-claim:{batch_id}")
+        return
+    with _RECORDS_LOCK:
+        _BATCH_CLAIMS.discard(batch_id)
+
+
+def store_run_job(job_id: str, job: Dict[str, Any]) -> None:
+    _store_record("job", job_id, job, RUN_JOB_TTL_SECONDS, _RUN_JOBS, RUN_JOB_MAX_ITEMS)
+
+
+def get_run_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return _get_record("job", job_id, _RUN_JOBS)
+
+
+def submission_cache_key(contact: dict, form_fields: dict) -> str:
+    """
+    Stable hash of everything that shapes a blueprint, so a resubmitted form
+    (double click, webhook retry) maps to the same key. "" = don't cache.
+    """
+    try:
+        raw = orjson.dumps(
+            {"contact": contact, "form_fields": form_fields},
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+    except TypeError:
+        return ""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def get_cached_result(key: str) -> Optional[Dict[str, Any]]:
+    if not key:
+        return None
+    if redis_client is not None:
+        # only a dedupe cache: an unreachable Redis is a miss, not a failed /run
+        try:
+            raw = redis_client.get(f"blueprint:{key}")
+        except redis.RedisError:
+            return None
+        return json.loads(raw) if raw else None
+    with _RESULT_CACHE_LOCK:
+        item = _RESULT_CACHE.get(key)
+        if not item:
+            return None
+        if item["expires_at"] <= time.time():
+            _RESULT_CACHE.pop(key, None)
+            return None
+        return item["value"]
+
+
+def store_cached_result(key: str, value: Dict[str, Any]) -> None:
+    if not key:
+        return
+    if redis_client is not None:
+        try:
+            redis_client.set(f"blueprint:{key}", json.dumps(value), ex=RESULT_CACHE_TTL_SECONDS)
+        except redis.RedisError:
+            pass
+        return
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE.pop(key, None)
+        _RESULT_CACHE[key] = {"value": value, "expires_at": time.time() + RESULT_CACHE_TTL_SECONDS}
+        # dicts keep insertion order, so the first key is the oldest entry
+        while len(_RESULT_CACHE) > RESULT_CACHE_MAX_ITEMS:
+            _RESULT_CACHE.pop(next(iter(_RESULT_CACHE)))
+
+
+_HTML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
 def safe_p(s: str) -> str:
     if s is None:
         return ""
-    return str(s).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if not isinstance(s, str):
+        s = str(s)
+    if "&" not in s and "<" not in s and ">" not in s:
+        return s
+    return s.translate(_HTML_ESCAPE_TABLE)
 
 
 def _strip_bullet_prefix(s: str) -> str:
     s = (s or "").strip()
-    if s.startswith("- "):
-        return s[2:].strip()
-    if s.startswith("• "):
-        return s[2:].strip()
-    if s.startswith("-"):
-        return s[1:].strip()
-    if s.startswith("•"):
+    # "- x" and "-x" both reduce to dropping the marker and re-stripping
+    if s.startswith(("-", "•")):
         return s[1:].strip()
     return s
 
@@ -150,46 +570,124 @@ def _shorten_list(items: List[str], max_items: int, max_words: int = 10, max_cha
     return out
 
 
-def _get_any(form_fields: dict, keys: List[str]) -> str:
+# Aliases and form labels repeat on every request, and dict keys are always
+# hashable, so the normalised form is cached.
+@functools.lru_cache(maxsize=1024)
+def _norm_field_key(x: str) -> str:
+    return _RE_NON_ALNUM.sub("", str(x).strip().lower())
+
+
+# (form_fields, lowercased key -> key, normalised key -> key)
+FormIndex = Tuple[dict, Dict[str, Any], Dict[str, Any]]
+
+
+def _index_form(form_fields: dict) -> FormIndex:
+    """
+    Builds the case- and punctuation-insensitive key maps for a submission
+    once, so looking up every field in it is just dict hits.
+    """
+    if not isinstance(form_fields, dict):
+        form_fields = {}
+    return (
+        form_fields,
+        {str(k).strip().lower(): k for k in form_fields.keys()},
+        {_norm_field_key(k): k for k in form_fields.keys()},
+    )
+
+
+def _get_any_idx(index: FormIndex, keys: Sequence[str]) -> str:
     """
     Safely get the first matching field from:
     - exact key
     - key match ignoring case
     - key match ignoring punctuation differences
     """
-    if not isinstance(form_fields, dict):
-        return ""
+    form_fields, lower_map, norm_map = index
 
     for k in keys:
         if k in form_fields:
             return clean_value(form_fields.get(k))
 
-    lower_map = {str(k).strip().lower(): k for k in form_fields.keys()}
     for k in keys:
         lk = str(k).strip().lower()
         if lk in lower_map:
             return clean_value(form_fields.get(lower_map[lk]))
 
-    def norm(x: str) -> str:
-        return re.sub(r"[^a-z0-9]+", "", str(x).strip().lower())
-
-    norm_map = {norm(k): k for k in form_fields.keys()}
     for k in keys:
-        nk = norm(k)
+        nk = _norm_field_key(k)
         if nk in norm_map:
             return clean_value(form_fields.get(norm_map[nk]))
 
     return ""
 
 
+# Form field -> accepted labels, in lookup order. Covers the snake_case
+# webhook keys plus the visible question text of each form version.
+FORM_FIELD_ALIASES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("business_name", ("business_name", "Business Name")),
+    ("business_type", ("business_type", "Business Type")),
+    ("services_offered", (
+        "services_offered",
+        "Services You Offer",
+        "In a sentence or two, what do you sell or do?",
+        "What do you sell or do?",
+        "What do you do?",
+    )),
+    ("stress", (
+        "frustrations",
+        "What Frustrates You Most",
+        "What feels hardest or most stressful right now?",
+        "What feels hardest or most stressful right now",
+    )),
+    ("remember", (
+        "bottlenecks",
+        "Biggest Operational Bottlenecks",
+        "What do you feel like you’re always trying to remember or keep track of?",
+        "What do you feel like you're always trying to remember or keep track of?",
+        "What are you always trying to remember?",
+    )),
+    ("leads_raw", (
+        "leads_per_week",
+        "Leads Per Week",
+        "About how many new leads or messages do you get in a week?",
+        "About how many new leads or messages do you get in a week",
+        "New customers/leads per week",
+        "Leads/messages per week",
+    )),
+    ("jobs_raw", (
+        "jobs_per_week",
+        "Jobs Per Week",
+        "About how many jobs, orders, or clients do you handle in a week?",
+        "About how many jobs, orders, or clients do you handle in a week",
+        "Jobs/orders per week",
+        "Jobs/orders/clients per week",
+    )),
+)
+
+
+_RE_JSON_OBJECT = re.compile(r"\{.*\}", re.S)
+
+# Responses API "text" option: the prompt asks for JSON, this makes the model
+# return a bare JSON object (also sent with each /run_batch request body)
+_MODEL_TEXT_FORMAT = {"format": {"type": "json_object"}}
+
+
 def _extract_json_object(text: str) -> dict:
     if not text:
         return {}
-    m = re.search(r"\{.*\}", text, flags=re.S)
+    # with the json_object text format the reply is normally bare JSON, so the
+    # greedy regex only runs for replies wrapped in prose or code fences
+    try:
+        out = orjson.loads(text)
+        if isinstance(out, dict):
+            return out
+    except orjson.JSONDecodeError:
+        pass
+    m = _RE_JSON_OBJECT.search(text)
     if not m:
         return {}
     try:
-        return json.loads(m.group(0))
+        return orjson.loads(m.group(0))
     except Exception:
         return {}
 
@@ -197,6 +695,16 @@ def _extract_json_object(text: str) -> dict:
 # --------------------------------------------------------------------
 # VOLUME PARSING (ROBUST)
 # --------------------------------------------------------------------
+_RE_NUM = re.compile(r"(\d+(?:\.\d+)?)")
+_RE_RANGE = re.compile(r"\d+(?:\.\d+)?\s*(?:-|\bto\b)\s*\d+(?:\.\d+)?")
+
+_RE_UNIT_WEEK = re.compile(r"\b(per\s*week|weekly|wk|/wk|/week)\b")
+_RE_UNIT_DAY = re.compile(r"\b(per\s*day|daily|/day|a\s*day|each\s*day)\b")
+_RE_UNIT_BUSINESS_DAY = re.compile(r"\b(business\s*day|weekday|week\s*day)\b")
+_RE_UNIT_MONTH = re.compile(r"\b(per\s*month|monthly|/month)\b")
+_RE_UNIT_YEAR = re.compile(r"\b(per\s*year|yearly|annually|/year)\b")
+
+
 def _parse_range_or_number(s: str) -> Optional[float]:
     """
     Returns a float from:
@@ -207,16 +715,19 @@ def _parse_range_or_number(s: str) -> Optional[float]:
     s = clean_value(s)
     if not s:
         return None
+    # most form answers are a bare number ("12"); isascii keeps out "²" etc.
+    if s.isdigit() and s.isascii():
+        return float(s)
 
+    # "10 to 15" is matched by _RE_RANGE directly, no rewrite to "-" needed
     t = s.lower().replace(",", " ")
     t = t.replace("–", "-").replace("—", "-")
-    t = re.sub(r"\bto\b", "-", t)
 
-    nums = re.findall(r"(\d+(?:\.\d+)?)", t)
+    nums = _RE_NUM.findall(t)
     if not nums:
         return None
 
-    if re.search(r"\d+(?:\.\d+)?\s*-\s*\d+(?:\.\d+)?", t) and len(nums) >= 2:
+    if len(nums) >= 2 and _RE_RANGE.search(t):
         a = float(nums[0])
         b = float(nums[1])
         return (a + b) / 2.0
@@ -235,18 +746,18 @@ def _weekly_multiplier_from_text(s: str) -> float:
     if not t:
         return 1.0
 
-    if re.search(r"\b(per\s*week|weekly|wk|/wk|/week)\b", t):
+    if _RE_UNIT_WEEK.search(t):
         return 1.0
 
-    if re.search(r"\b(per\s*day|daily|/day|a\s*day|each\s*day)\b", t):
-        if re.search(r"\b(business\s*day|weekday|week\s*day)\b", t):
+    if _RE_UNIT_DAY.search(t):
+        if _RE_UNIT_BUSINESS_DAY.search(t):
             return 5.0
         return 7.0
 
-    if re.search(r"\b(per\s*month|monthly|/month)\b", t):
+    if _RE_UNIT_MONTH.search(t):
         return 1.0 / 4.33
 
-    if re.search(r"\b(per\s*year|yearly|annually|/year)\b", t):
+    if _RE_UNIT_YEAR.search(t):
         return 1.0 / 52.0
 
     if "/d" in t:
@@ -358,6 +869,24 @@ FIX_3 = {
 ALL_FIXES = [FIX_1, FIX_2, FIX_3]
 
 
+# Keyword groups are substring checks against the lowercased answers. A word
+# that contains another word of its group ("leads" / "lead") can never change
+# an any() result, so each group lists only the shortest forms.
+_LEAD_KEYWORDS = (
+    "lead", "inquiry", "inquiries", "message", "dm", "text", "reply", "respond",
+    "response", "follow", "forgot", "forget", "miss", "ghost", "instagram", "facebook",
+)
+_CHANNEL_KEYWORDS = ("email", "website", "call", "phone")
+_SCHEDULING_KEYWORDS = (
+    "schedule", "scheduling", "calendar", "appointment", "book", "no-show", "noshow", "availability",
+)
+_BACK_AND_FORTH_KEYWORDS = ("back and forth", "back-and-forth")
+_AFTER_JOB_KEYWORDS = (
+    "review", "google", "yelp", "testimonial", "repeat", "return", "retention",
+    "check in", "check-in", "after", "follow through", "follow-through",
+)
+
+
 def _pick_and_rank_fixes(services: str, stress: str, remember: str) -> List[dict]:
     text = " ".join([services or "", stress or "", remember or ""]).lower()
 
@@ -365,28 +894,17 @@ def _pick_and_rank_fixes(services: str, stress: str, remember: str) -> List[dict
     score_2 = 0
     score_3 = 0
 
-    if any(k in text for k in [
-        "lead", "leads", "inquiry", "inquiries", "message", "messages", "dm",
-        "text", "reply", "respond", "response", "follow", "follow-up",
-        "forgot", "forget", "miss", "missed", "ghost", "instagram", "facebook"
-    ]):
+    if any(k in text for k in _LEAD_KEYWORDS):
         score_1 += 3
-    if any(k in text for k in ["email", "website", "call", "phone"]):
+    if any(k in text for k in _CHANNEL_KEYWORDS):
         score_1 += 1
 
-    if any(k in text for k in [
-        "schedule", "scheduling", "calendar", "appointment", "appointments",
-        "book", "booking", "reschedule", "no-show", "noshow", "availability"
-    ]):
+    if any(k in text for k in _SCHEDULING_KEYWORDS):
         score_2 += 3
-    if "back and forth" in text or "back-and-forth" in text:
+    if any(k in text for k in _BACK_AND_FORTH_KEYWORDS):
         score_2 += 2
 
-    if any(k in text for k in [
-        "review", "reviews", "google", "yelp", "testimonial",
-        "repeat", "return", "retention", "check in", "check-in",
-        "after", "afterward", "follow through", "follow-through"
-    ]):
+    if any(k in text for k in _AFTER_JOB_KEYWORDS):
         score_3 += 3
 
     scores = [(score_1, FIX_1), (score_2, FIX_2), (score_3, FIX_3)]
@@ -395,11 +913,16 @@ def _pick_and_rank_fixes(services: str, stress: str, remember: str) -> List[dict
     if scores[0][0] == 0:
         return [FIX_1, FIX_2, FIX_3]
 
-    ranked = [scores[0][1]]
-    for _, fx in scores[1:]:
-        if fx not in ranked:
-            ranked.append(fx)
-    return ranked[:3]
+    # scores holds each fix exactly once, so the sorted order is the ranking
+    return [fx for _, fx in scores]
+
+
+_CHAOS_WORDS = (
+    "miss", "missed", "forgot", "forget",
+    "overwhelm", "overwhelmed", "behind", "stress",
+    "mess", "chaos", "dropped", "drop",
+)
+_SCORE_SCHEDULING_KEYWORDS = ("schedule", "booking", "no-show", "calendar", "appointment")
 
 
 def _estimate_score(stress: str, remember: str, leads_weekly: Optional[int], jobs_weekly: Optional[int]) -> int:
@@ -409,12 +932,9 @@ def _estimate_score(stress: str, remember: str, leads_weekly: Optional[int], job
     risk = 35
     text = " ".join([stress or "", remember or ""]).lower()
 
-    chaos_words = [
-        "miss", "missed", "forgot", "forget",
-        "overwhelm", "overwhelmed", "behind", "stress",
-        "mess", "chaos", "dropped", "drop"
-    ]
-    for w in chaos_words:
+    # every listed word found adds to the score, so overlaps ("miss"/"missed")
+    # are deliberate here
+    for w in _CHAOS_WORDS:
         if w in text:
             risk += 6
 
@@ -438,7 +958,7 @@ def _estimate_score(stress: str, remember: str, leads_weekly: Optional[int], job
     else:
         risk += 6
 
-    if any(k in text for k in ["schedule", "booking", "no-show", "calendar", "appointment"]):
+    if any(k in text for k in _SCORE_SCHEDULING_KEYWORDS):
         risk += 6
 
     return max(10, min(95, int(risk)))
@@ -461,6 +981,10 @@ ALLOWED_IMPROVE_BUCKETS = [
 ]
 
 
+_IMPROVE_SCHEDULING_KEYWORDS = ("appointment", "schedule", "calendar", "booking", "no-show", "noshow")
+_IMPROVE_MISSED_KEYWORDS = ("miss", "forgot", "forget", "inbox", "messages", "dm", "text")
+
+
 def _build_improve_list(stress: str, remember: str) -> List[str]:
     text = (" ".join([stress or "", remember or ""])).lower()
     out: List[str] = []
@@ -468,9 +992,9 @@ def _build_improve_list(stress: str, remember: str) -> List[str]:
     out.append("Faster replies")
     out.append("Consistent follow-up")
 
-    if any(k in text for k in ["appointment", "schedule", "calendar", "booking", "no-show", "noshow"]):
+    if any(k in text for k in _IMPROVE_SCHEDULING_KEYWORDS):
         out.append("Less back-and-forth scheduling")
-    elif any(k in text for k in ["miss", "missed", "forgot", "forget", "inbox", "messages", "dm", "text"]):
+    elif any(k in text for k in _IMPROVE_MISSED_KEYWORDS):
         out.append("No missed messages")
     else:
         out.append("Clear next steps")
@@ -478,12 +1002,8 @@ def _build_improve_list(stress: str, remember: str) -> List[str]:
     if len(out) < 3:
         out.append("Clear next steps")
 
-    seen = set()
-    cleaned = []
-    for x in out:
-        if x in ALLOWED_IMPROVE_BUCKETS and x not in seen:
-            cleaned.append(x)
-            seen.add(x)
+    # dict keys keep first-seen order, so this dedupes in a single pass
+    cleaned = [x for x in dict.fromkeys(out) if x in ALLOWED_IMPROVE_BUCKETS]
 
     while len(cleaned) < 3:
         if "Clear next steps" not in cleaned:
@@ -499,6 +1019,9 @@ def _build_improve_list(stress: str, remember: str) -> List[str]:
 # --------------------------------------------------------------------
 # PDF DESIGN SYSTEM
 # --------------------------------------------------------------------
+# Styles are read-only once built (nothing assigns into them), so every PDF
+# and every page callback shares one copy.
+@functools.lru_cache(maxsize=1)
 def _brand_styles():
     styles = getSampleStyleSheet()
 
@@ -618,30 +1141,38 @@ def _brand_styles():
     }
 
 
-def _header_footer(canvas, doc):
+# Header/footer geometry on US Letter (points)
+_PAGE_W, _PAGE_H = letter
+_MARGIN_X = 38
+_RIGHT_X = _PAGE_W - _MARGIN_X
+_HEADER_RULE_Y = _PAGE_H - 44
+_HEADER_TEXT_Y = _PAGE_H - 36
+_FOOTER_RULE_Y = 44
+_FOOTER_TEXT_Y = 32
+
+
+def _header_footer(canvas, doc, today_str: Optional[str] = None):
     st = _brand_styles()
     canvas.saveState()
-    w, h = letter
 
+    # Draws are grouped by graphics state so each color/font is set once per page.
+    # Rules (header + footer)
     canvas.setStrokeColor(st["SOFT"])
     canvas.setLineWidth(1)
-    canvas.line(38, h - 44, w - 38, h - 44)
+    canvas.line(_MARGIN_X, _HEADER_RULE_Y, _RIGHT_X, _HEADER_RULE_Y)
+    canvas.line(_MARGIN_X, _FOOTER_RULE_Y, _RIGHT_X, _FOOTER_RULE_Y)
 
+    # Bold header title
     canvas.setFont("Helvetica-Bold", 9)
     canvas.setFillColor(st["NAVY"])
-    canvas.drawString(38, h - 36, "Apex Automation — Business Blueprint")
-
-    canvas.setFont("Helvetica", 9)
-    canvas.setFillColor(st["MUTED"])
-    canvas.drawRightString(w - 38, h - 36, time.strftime("%b %d, %Y"))
-
-    canvas.setStrokeColor(st["SOFT"])
-    canvas.line(38, 44, w - 38, 44)
+    canvas.drawString(_MARGIN_X, _HEADER_TEXT_Y, "Apex Automation — Business Blueprint")
 
+    # Muted header date + footer text
     canvas.setFont("Helvetica", 9)
     canvas.setFillColor(st["MUTED"])
-    canvas.drawString(38, 32, "Confidential — Prepared for the business owner listed on the cover")
-    canvas.drawRightString(w - 38, 32, f"Page {doc.page}")
+    canvas.drawRightString(_RIGHT_X, _HEADER_TEXT_Y, today_str or time.strftime("%b %d, %Y"))
+    canvas.drawString(_MARGIN_X, _FOOTER_TEXT_Y, "Confidential — Prepared for the business owner listed on the cover")
+    canvas.drawRightString(_RIGHT_X, _FOOTER_TEXT_Y, f"Page {doc.page}")
 
     canvas.restoreState()
 
@@ -660,49 +1191,61 @@ def _card_table(
     bg_color = bg if bg is not None else st["CARD_BG"]
 
     rows: List[List[Any]] = [[Paragraph(f"<b>{safe_p(title)}</b>", st["h2"])]]
-    clean_bullets = [clean_value(b) for b in bullets if clean_value(b)]
+    clean_bullets = [b for b in map(clean_value, bullets) if b]
 
+    body_style = st["body"]
     if not clean_bullets and placeholder_if_empty:
-        rows.append([Paragraph("No details provided.", st["body"])])
+        rows.append([Paragraph("No details provided.", body_style)])
     else:
-        for b in clean_bullets:
-            rows.append([Paragraph("• " + safe_p(b), st["body"])])
+        # bind once: this loop runs for every bullet on every card
+        _para, _esc = Paragraph, safe_p
+        rows.extend([_para("• " + _esc(b), body_style)] for b in clean_bullets)
 
     tbl = Table(rows, colWidths=[7.44 * inch], hAlign="LEFT")
-    tbl.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, -1), bg_color),
-                ("BOX", (0, 0), (-1, -1), 1, st["BORDER"]),
-                ("LINEBEFORE", (0, 0), (0, -1), 4, st["BLUE"]),
-                ("LEFTPADDING", (0, 0), (-1, -1), 14),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 14),
-                ("TOPPADDING", (0, 0), (-1, -1), 10 + extra_padding),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 10 + extra_padding),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ]
-        )
-    )
+    tbl.setStyle(_card_table_style(bg_color, st["BORDER"], st["BLUE"], extra_padding))
     return tbl
 
 
+@functools.lru_cache(maxsize=32)
+def _card_table_style(bg_color, border_color, accent_color, extra_padding: int) -> TableStyle:
+    """
+    Cards only vary by colors and padding, so each combination's TableStyle
+    is built once and shared (Table.setStyle only reads it).
+    """
+    return TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, -1), bg_color),
+            ("BOX", (0, 0), (-1, -1), 1, border_color),
+            ("LINEBEFORE", (0, 0), (0, -1), 4, accent_color),
+            ("LEFTPADDING", (0, 0), (-1, -1), 14),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 14),
+            ("TOPPADDING", (0, 0), (-1, -1), 10 + extra_padding),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 10 + extra_padding),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]
+    )
+
+
 def _fix_header_bar(title: str, st) -> Table:
     tbl = Table([[Paragraph(safe_p(title), st["fix_header"])]], colWidths=[7.44 * inch])
-    tbl.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, -1), st["BLUE_DK"]),
-                ("BOX", (0, 0), (-1, -1), 1, st["BLUE_DK"]),
-                ("LEFTPADDING", (0, 0), (-1, -1), 14),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 14),
-                ("TOPPADDING", (0, 0), (-1, -1), 10),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
-            ]
-        )
-    )
+    tbl.setStyle(_fix_header_bar_style(st["BLUE_DK"]))
     return tbl
 
 
+@functools.lru_cache(maxsize=4)
+def _fix_header_bar_style(fill_color) -> TableStyle:
+    return TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, -1), fill_color),
+            ("BOX", (0, 0), (-1, -1), 1, fill_color),
+            ("LEFTPADDING", (0, 0), (-1, -1), 14),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 14),
+            ("TOPPADDING", (0, 0), (-1, -1), 10),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
+        ]
+    )
+
+
 def _bar_chart(title: str, labels: List[str], values: List[int], st, height: int = 115) -> Drawing:
     """
     Compact bar chart that fits on the cover.
@@ -878,10 +1421,7 @@ def _cta_block(st) -> List[Any]:
     )
 
     # ✅ NEW: line directly above the button (as requested)
-    pre_btn_line = Paragraph(
-        safe_p("If you want help fixing this without guessing…"),
-        st["body"],
-    )
+    pre_btn_line = Paragraph("If you want help fixing this without guessing…", st["body"])
 
     # ✅ NEW: button text
     btn_text = f'<link href="{safe_p(url)}" color="white"><b>Help me fix this →</b></link>'
@@ -892,24 +1432,27 @@ def _cta_block(st) -> List[Any]:
         rowHeights=[0.95 * inch],
         hAlign="LEFT",
     )
-    btn.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, -1), st["BLUE_DK"]),
-                ("BOX", (0, 0), (-1, -1), 1, st["BLUE_DK"]),
-                ("TOPPADDING", (0, 0), (-1, -1), 22),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 22),
-                ("LEFTPADDING", (0, 0), (-1, -1), 14),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 14),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-            ]
-        )
-    )
+    btn.setStyle(_cta_button_style(st["BLUE_DK"]))
 
     return [KeepTogether([call_details, Spacer(1, 12), title, Spacer(1, 12), pre_btn_line, Spacer(1, 10), btn])]
 
 
+@functools.lru_cache(maxsize=4)
+def _cta_button_style(fill_color) -> TableStyle:
+    return TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, -1), fill_color),
+            ("BOX", (0, 0), (-1, -1), 1, fill_color),
+            ("TOPPADDING", (0, 0), (-1, -1), 22),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 22),
+            ("LEFTPADDING", (0, 0), (-1, -1), 14),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 14),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ]
+    )
+
+
 # --------------------------------------------------------------------
 # BLUEPRINT CONTENT
 # --------------------------------------------------------------------
@@ -976,16 +1519,9 @@ def _plan_30_days_aligned() -> Dict[str, List[str]]:
     }
 
 
-def _ask_model_for_parts(
-    business_name: str,
-    services: str,
-    stress: str,
-    remember: str,
-    leads_raw: str,
-    jobs_raw: str,
-    fix1_name: str,
-) -> dict:
-    prompt = f"""
+# Static instructions come first so the prompt prefix is byte-identical across
+# requests (provider prompt caching); per-lead details are filled in at the end.
+MODEL_PROMPT_TEMPLATE = """
 Write for a stressed business owner.
 Third-grade reading level.
 Short sentences. No tech words.
@@ -994,15 +1530,6 @@ IMPORTANT:
 - Do NOT mention inventory systems, ads, SEO, or marketing strategy.
 - Keep it in this lane only: missed messages, follow-up, scheduling, no-shows, after-job check-ins, reviews.
 
-Business name: {business_name or "Your Business"}
-What they do: {services or "Not provided"}
-Hardest right now: {stress or "Not provided"}
-Always trying to remember: {remember or "Not provided"}
-Leads/messages (raw): {leads_raw or "Not provided"}
-Jobs/orders (raw): {jobs_raw or "Not provided"}
-
-Best first fix is: {fix1_name}
-
 Return ONLY valid JSON in this exact shape:
 
 {{
@@ -1013,10 +1540,33 @@ Rules:
 - quick_snapshot = 4 to 6 bullets
 - bullets must stay inside the allowed lane above
 - simple words only
+
+Business name: {business_name}
+What they do: {services_offered}
+Hardest right now: {stress}
+Always trying to remember: {remember}
+Leads/messages (raw): {leads_raw}
+Jobs/orders (raw): {jobs_raw}
+
+Best first fix is: {fix1_name}
 """
-    response = client.responses.create(
-        model="gpt-4.1-mini",
+
+
+def _model_prompt(fields: Dict[str, str], fix1_name: str) -> str:
+    # Template placeholders are the FORM_FIELD_ALIASES keys, so the parsed
+    # fields fill it directly.
+    display = {k: v or "Not provided" for k, v in fields.items()}
+    display["business_name"] = fields.get("business_name") or "Your Business"
+    display["fix1_name"] = fix1_name
+    return MODEL_PROMPT_TEMPLATE.format_map(display)
+
+
+def _ask_model_for_parts(fields: Dict[str, str], fix1_name: str) -> dict:
+    prompt = _model_prompt(fields, fix1_name)
+    response = get_openai_client().responses.create(
+        model=OPENAI_MODEL,
         input=prompt,
+        text=_MODEL_TEXT_FORMAT,
     )
 
     raw_text = ""
@@ -1034,7 +1584,7 @@ Rules:
 # --------------------------------------------------------------------
 def generate_pdf_blueprint(
     bp: dict,
-    pdf_path: str,
+    pdf_file: Union[str, BinaryIO],
     lead_name: str,
     business_name: str,
     business_type: str,
@@ -1044,11 +1594,17 @@ def generate_pdf_blueprint(
     jobs_norm: str,
     risk_score: int,
 ):
+    """
+    Renders the blueprint into `pdf_file`, which can be a path or a writable
+    binary file object (e.g. io.BytesIO) so callers can skip the disk.
+    """
     st = _brand_styles()
 
     doc = SimpleDocTemplate(
-        pdf_path,
+        pdf_file,
         pagesize=letter,
+        # no build timestamp / random file ID, so equal content means equal bytes (see pdf_content_key)
+        invariant=1,
         title="Business Blueprint",
         author="Apex Automation",
         leftMargin=38,
@@ -1206,17 +1762,28 @@ def generate_pdf_blueprint(
     story.append(Spacer(1, 18))
     story.extend(_cta_block(st))
 
-    doc.build(story, onFirstPage=_header_footer, onLaterPages=_header_footer)
+    # Format the header date once per PDF rather than once per page.
+    on_page = functools.partial(_header_footer, today_str=time.strftime("%b %d, %Y"))
+    doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+
+
+def render_pdf_bytes(**pdf_kwargs: Any) -> bytes:
+    """
+    generate_pdf_blueprint into memory. Module-level and picklable, so it can
+    run in _pdf_process_pool().
+    """
+    buf = io.BytesIO()
+    generate_pdf_blueprint(pdf_file=buf, **pdf_kwargs)
+    return buf.getvalue()
 
 
 # --------------------------------------------------------------------
-# /run – BLUEPRINT GENERATION
+# BLUEPRINT PIPELINE (shared by /run and the batch routes)
 # --------------------------------------------------------------------
-@app.route("/run", methods=["POST"])
-def run_blueprint():
-    t0 = time.time()
-    data = request.get_json(force=True) or {}
-
+def _parse_submission(data: dict) -> Dict[str, Any]:
+    """
+    Pulls the contact and form answers out of a /run-style payload.
+    """
     contact = data.get("contact", {}) or data.get("contact_data", {}) or {}
     form_fields = (
         data.get("form_fields")
@@ -1237,52 +1804,37 @@ def run_blueprint():
     phone_digits = normalize_phone(phone_raw)
     phone_e164 = to_e164(phone_digits)
 
-    business_name = _get_any(form_fields, ["business_name", "Business Name"])
-    business_type = _get_any(form_fields, ["business_type", "Business Type"])
-
-    services_offered = _get_any(form_fields, [
-        "services_offered",
-        "Services You Offer",
-        "In a sentence or two, what do you sell or do?",
-        "What do you sell or do?",
-        "What do you do?",
-    ])
-
-    stress = _get_any(form_fields, [
-        "frustrations",
-        "What Frustrates You Most",
-        "What feels hardest or most stressful right now?",
-        "What feels hardest or most stressful right now",
-    ])
+    form_index = _index_form(form_fields)
+    fields = {key: _get_any_idx(form_index, aliases) for key, aliases in FORM_FIELD_ALIASES}
 
-    remember = _get_any(form_fields, [
-        "bottlenecks",
-        "Biggest Operational Bottlenecks",
-        "What do you feel like you’re always trying to remember or keep track of?",
-        "What do you feel like you're always trying to remember or keep track of?",
-        "What are you always trying to remember?",
-    ])
+    leads_weekly, leads_norm = parse_volume_to_weekly(fields["leads_raw"])
+    jobs_weekly, jobs_norm = parse_volume_to_weekly(fields["jobs_raw"])
 
-    leads_raw = _get_any(form_fields, [
-        "leads_per_week",
-        "Leads Per Week",
-        "About how many new leads or messages do you get in a week?",
-        "About how many new leads or messages do you get in a week",
-        "New customers/leads per week",
-        "Leads/messages per week",
-    ])
+    return {
+        "contact": contact,
+        "form_fields": form_fields,
+        "name": name,
+        "email": email,
+        "phone_digits": phone_digits,
+        "phone_e164": phone_e164,
+        "fields": fields,
+        "leads_weekly": leads_weekly,
+        "leads_norm": leads_norm,
+        "jobs_weekly": jobs_weekly,
+        "jobs_norm": jobs_norm,
+    }
 
-    jobs_raw = _get_any(form_fields, [
-        "jobs_per_week",
-        "Jobs Per Week",
-        "About how many jobs, orders, or clients do you handle in a week?",
-        "About how many jobs, orders, or clients do you handle in a week",
-        "Jobs/orders per week",
-        "Jobs/orders/clients per week",
-    ])
 
-    leads_weekly, leads_norm = parse_volume_to_weekly(leads_raw)
-    jobs_weekly, jobs_norm = parse_volume_to_weekly(jobs_raw)
+def _build_blueprint(sub: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rule-based blueprint content. The model can later polish quick_snapshot.
+    """
+    fields = sub["fields"]
+    services_offered = fields["services_offered"]
+    stress = fields["stress"]
+    remember = fields["remember"]
+    leads_weekly = sub["leads_weekly"]
+    jobs_weekly = sub["jobs_weekly"]
 
     ranked = _pick_and_rank_fixes(services_offered, stress, remember)
     fix1, fix2, fix3 = ranked[0], ranked[1], ranked[2]
@@ -1291,9 +1843,9 @@ def run_blueprint():
     plan_30 = _plan_30_days_aligned()
     risk_score = _estimate_score(stress, remember, leads_weekly, jobs_weekly)
 
-    bp: Dict[str, Any] = {
+    return {
         "quick_snapshot": _diagnosis_summary(services_offered, stress, remember, leads_weekly, jobs_weekly),
-        "what_you_told_me": _what_you_told_me(services_offered, stress, remember, leads_norm, jobs_norm),
+        "what_you_told_me": _what_you_told_me(services_offered, stress, remember, sub["leads_norm"], sub["jobs_norm"]),
         "fix_1": {
             "name": fix1["name"],
             "what_this_fixes": fix1["what_this_fixes"],
@@ -1307,53 +1859,45 @@ def run_blueprint():
         "score": risk_score,
     }
 
-    # Optional model polish for quick snapshot only (safe)
-    try:
-        model_part = _ask_model_for_parts(
-            business_name=business_name,
-            services=services_offered,
-            stress=stress,
-            remember=remember,
-            leads_raw=leads_raw,
-            jobs_raw=jobs_raw,
-            fix1_name=fix1["name"],
-        )
-        if isinstance(model_part.get("quick_snapshot"), list) and model_part["quick_snapshot"]:
-            qs = _shorten_list([_strip_bullet_prefix(str(x)) for x in model_part["quick_snapshot"]], 6, max_words=12)
-            if qs:
-                bp["quick_snapshot"] = qs
-    except Exception:
-        pass
 
-    pdf_id = uuid.uuid4().hex
-    pdf_filename = f"business_blueprint_{pdf_id}.pdf"
-    pdf_path = os.path.join("/tmp", pdf_filename)
+def _apply_model_part(bp: Dict[str, Any], model_part: dict) -> None:
+    if isinstance(model_part.get("quick_snapshot"), list) and model_part["quick_snapshot"]:
+        qs = _shorten_list([_strip_bullet_prefix(str(x)) for x in model_part["quick_snapshot"]], 6, max_words=12)
+        if qs:
+            bp["quick_snapshot"] = qs
+
+
+def _publish_blueprint(sub: Dict[str, Any], bp: Dict[str, Any], t0: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Renders + uploads the PDF and stores the phone context.
+    Returns (response_body, context_blob).
+    """
+    fields = sub["fields"]
+    leads_weekly, jobs_weekly = sub["leads_weekly"], sub["jobs_weekly"]
+    leads_norm, jobs_norm = sub["leads_norm"], sub["jobs_norm"]
 
-    generate_pdf_blueprint(
+    pdf_kwargs = dict(
         bp=bp,
-        pdf_path=pdf_path,
-        lead_name=name,
-        business_name=business_name,
-        business_type=business_type,
+        lead_name=sub["name"],
+        business_name=fields["business_name"],
+        business_type=fields["business_type"],
         leads_weekly=leads_weekly,
         jobs_weekly=jobs_weekly,
         leads_norm=leads_norm,
         jobs_norm=jobs_norm,
-        risk_score=risk_score,
+        risk_score=bp["score"],
     )
+    if PDF_PROCESS_WORKERS > 0:
+        pdf_bytes = _pdf_process_pool().submit(render_pdf_bytes, **pdf_kwargs).result(
+            timeout=PDF_RENDER_TIMEOUT_SECONDS
+        )
+    else:
+        pdf_bytes = render_pdf_bytes(**pdf_kwargs)
 
-    if not S3_BUCKET:
-        return jsonify({"success": False, "error": "S3_BUCKET_NAME env var is not set"}), 500
+    s3_key = pdf_content_key(pdf_bytes)
+    upload_pdf_to_s3(pdf_bytes, s3_key, pdf_download_name(fields["business_name"]))
 
-    s3_key = f"blueprints/{pdf_filename}"
-    s3_client.upload_file(
-        Filename=pdf_path,
-        Bucket=S3_BUCKET,
-        Key=s3_key,
-        ExtraArgs={"ContentType": "application/pdf", "ACL": "public-read"},
-    )
-
-    pdf_url = f"https://{S3_BUCKET}.s3.{S3_REGION}.amazonaws.com/{s3_key}"
+    pdf_url = pdf_public_url(s3_key)
 
     # ✅ clean, top-level value for GoHighLevel mapping
     primary_fix_name = bp.get("fix_1", {}).get("name", "")
@@ -1368,8 +1912,8 @@ def run_blueprint():
         "fix_3_name": bp["fix_3"]["name"],
         "fix_3_short_summary": bp["fix_3"]["short_summary"],
         "slip_risk_score": bp.get("score", 70),
-        "leads_raw": leads_raw or "",
-        "jobs_raw": jobs_raw or "",
+        "leads_raw": fields["leads_raw"] or "",
+        "jobs_raw": fields["jobs_raw"] or "",
         "leads_weekly": leads_weekly if leads_weekly is not None else "",
         "jobs_weekly": jobs_weekly if jobs_weekly is not None else "",
         "leads_normalized": leads_norm or "",
@@ -1378,33 +1922,356 @@ def run_blueprint():
     }
 
     context_blob = {
-        "lead_name": name,
-        "lead_email": email,
-        "lead_phone_e164": phone_e164,
-        "business_name": business_name,
-        "business_type": business_type,
+        "lead_name": sub["name"],
+        "lead_email": sub["email"],
+        "lead_phone_e164": sub["phone_e164"],
+        "business_name": fields["business_name"],
+        "business_type": fields["business_type"],
         "pdf_url": pdf_url,
         "proposal_fields": proposal_fields,
         "quick_snapshot": bp.get("quick_snapshot", []),
-        "seconds": round(time.time() - t0, 2),
+        "seconds": round(time.perf_counter() - t0, 2),
+        "primary_fix_name": primary_fix_name,
+    }
+
+    # Only reached once the upload succeeded, so the context never points at
+    # a PDF that was never written.
+    if sub["phone_digits"]:
+        store_context_for_digits(sub["phone_digits"], context_blob)
+
+    response_body = {
+        "success": True,
+        "pdf_url": pdf_url,
+        "proposal_fields": proposal_fields,
         "primary_fix_name": primary_fix_name,
+        "name": sub["name"],
+        "email": sub["email"],
+        "phone_e164": sub["phone_e164"],
+        "seconds": round(time.perf_counter() - t0, 2),
     }
+    return response_body, context_blob
+
+
+# --------------------------------------------------------------------
+# /run – BLUEPRINT GENERATION
+# --------------------------------------------------------------------
+@app.route("/run", methods=["POST"])
+def run_blueprint():
+    t0 = time.perf_counter()
+    # Fail before the model call and PDF build, not after them.
+    if not S3_BUCKET:
+        return jsonify({"success": False, "error": "S3_BUCKET_NAME env var is not set"}), 500
+
+    data = request.get_json(force=True) or {}
+    sub = _parse_submission(data)
+
+    cache_key = submission_cache_key(sub["contact"], sub["form_fields"])
+    cached = get_cached_result(cache_key)
+    if cached is not None:
+        if sub["phone_digits"]:
+            store_context_for_digits(sub["phone_digits"], cached["context"])
+        return jsonify({**cached["response"], "seconds": round(time.perf_counter() - t0, 2)})
+
+    # Non-interactive submits can wait for the Batch API (half the token price).
+    # The background poller publishes the PDF; /batch/<id> is optional.
+    if request.args.get("mode") == "batch":
+        if JOB_STATE_NOT_SHARED:
+            return _job_state_not_shared_error()
+        if batch_store_full():
+            return jsonify({"success": False, "error": "too many unpublished batches, try again later"}), 503
+        batch_id = submit_blueprint_batch([data])
+        return jsonify({"success": True, "batch_id": batch_id, "status_url": f"/batch/{batch_id}"}), 202
+
+    if request.args.get("async") in ("1", "true"):
+        if JOB_STATE_NOT_SHARED:
+            return _job_state_not_shared_error()
+        job_id = secrets.token_hex(8)
+        store_run_job(job_id, {"status": "queued"})
+        run_job_executor.submit(_run_blueprint_job, job_id, sub, cache_key, t0)
+        return jsonify({"success": True, "job_id": job_id, "status": "queued", "status_url": f"/status/{job_id}"}), 202
+
+    return jsonify(_generate_blueprint(sub, cache_key, t0))
+
+
+def _job_state_not_shared_error() -> Tuple[Response, int]:
+    return jsonify({
+        "success": False,
+        "error": "async and batch modes need REDIS_URL when running more than one worker",
+    }), 501
+
+
+def _generate_blueprint(sub: Dict[str, Any], cache_key: str, t0: float) -> Dict[str, Any]:
+    bp = _build_blueprint(sub)
+
+    # Optional model polish for quick snapshot only (safe)
+    try:
+        _apply_model_part(bp, _ask_model_for_parts(sub["fields"], fix1_name=bp["fix_1"]["name"]))
+    except Exception:
+        pass
+
+    response_body, context_blob = _publish_blueprint(sub, bp, t0)
+    store_cached_result(cache_key, {"response": response_body, "context": context_blob})
+    return response_body
+
+
+def _run_blueprint_job(job_id: str, sub: Dict[str, Any], cache_key: str, t0: float) -> None:
+    store_run_job(job_id, {"status": "running"})
+    try:
+        store_run_job(job_id, {"status": "completed", "result": _generate_blueprint(sub, cache_key, t0)})
+    except Exception as e:
+        store_run_job(job_id, {"status": "failed", "error": str(e)})
+
+
+@app.route("/status/<job_id>", methods=["GET"])
+def run_status(job_id: str):
+    """
+    Poll target for POST /run?async=1. Without REDIS_URL a job is only known
+    to the worker process that queued it (see JOB_STATE_NOT_SHARED).
+    """
+    job = get_run_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "unknown job_id"}), 404
+    return jsonify({"success": job["status"] != "failed", **job})
+
+
+# --------------------------------------------------------------------
+# /run_batch + /batch/<id> – BULK GENERATION VIA THE OPENAI BATCH API
+# --------------------------------------------------------------------
+def _as_run_payload(item: Any) -> dict:
+    """
+    Batch items may be full /run payloads or bare form_fields dicts.
+    """
+    if not isinstance(item, dict):
+        return {}
+    if any(k in item for k in ("contact", "contact_data", "form_fields", "form", "form_submission")):
+        return item
+    return {"form_fields": item}
+
 
-    if phone_raw:
-        store_context_for_phone(phone_raw, context_blob)
-
-    return jsonify(
-        {
-            "success": True,
-            "pdf_url": pdf_url,
-            "proposal_fields": proposal_fields,
-            "primary_fix_name": primary_fix_name,
-            "name": name,
-            "email": email,
-            "phone_e164": phone_e164,
-            "seconds": round(time.time() - t0, 2),
-        }
+def _response_body_text(body: dict) -> str:
+    """
+    Output text of a Responses API body as it appears in batch result files.
+    """
+    for out in body.get("output") or []:
+        for part in out.get("content") or []:
+            if part.get("type") == "output_text":
+                return part.get("text", "")
+    return ""
+
+
+def submit_blueprint_batch(items: List[Any]) -> str:
+    lines: List[bytes] = []
+    for i, item in enumerate(items):
+        sub = _parse_submission(_as_run_payload(item))
+        bp = _build_blueprint(sub)
+        lines.append(orjson.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": {
+                "model": OPENAI_MODEL,
+                "input": _model_prompt(sub["fields"], bp["fix_1"]["name"]),
+                "text": _MODEL_TEXT_FORMAT,
+            },
+        }))
+
+    batch_file = get_openai_client().files.create(file=("blueprints.jsonl", b"\n".join(lines)), purpose="batch")
+    batch = get_openai_client().batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/responses",
+        completion_window="24h",
     )
+    store_batch_job(batch.id, {"items": items, "results": None})
+    return batch.id
+
+
+def _publish_batch_item(item: Any, model_text: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        sub = _parse_submission(_as_run_payload(item))
+        bp = _build_blueprint(sub)
+        _apply_model_part(bp, _extract_json_object(model_text))
+        response_body, _ = _publish_blueprint(sub, bp, t0)
+        return response_body
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def finish_blueprint_batch(items: List[Any], output_jsonl: str) -> List[Dict[str, Any]]:
+    model_text: Dict[str, str] = {}
+    for line in output_jsonl.splitlines():
+        if not line.strip():
+            continue
+        row = orjson.loads(line)
+        body = (row.get("response") or {}).get("body") or {}
+        model_text[str(row.get("custom_id", ""))] = _response_body_text(body)
+
+    # Own pool: this already runs on run_job_executor and must not wait on it.
+    with ThreadPoolExecutor(max_workers=BATCH_PUBLISH_WORKERS) as pool:
+        return list(pool.map(
+            lambda pair: _publish_batch_item(pair[1], model_text.get(str(pair[0]), "")),
+            enumerate(items),
+        ))
+
+
+def _publish_batch_job(batch_id: str, job: Dict[str, Any]) -> None:
+    """
+    Runs on run_job_executor: renders + uploads every item of a finished
+    batch and stores the results. On failure the record stays "publishing"
+    and the released claim lets the next poll start it again, until
+    BATCH_PUBLISH_MAX_ATTEMPTS marks it "failed".
+    """
+    try:
+        file_id = job.get("output_file_id")
+        output_jsonl = get_openai_client().files.content(file_id).text if file_id else ""
+        results = finish_blueprint_batch(job["items"], output_jsonl)
+        store_batch_job(batch_id, {**job, "status": "completed", "results": results})
+    except Exception as e:
+        attempts = job.get("publish_attempts", 1)
+        app.logger.exception(
+            "publishing batch %s failed (attempt %d of %d)", batch_id, attempts, BATCH_PUBLISH_MAX_ATTEMPTS
+        )
+        status = "failed" if attempts >= BATCH_PUBLISH_MAX_ATTEMPTS else "publishing"
+        try:
+            store_batch_job(batch_id, {**job, "status": status, "error": str(e)})
+        except Exception:
+            app.logger.exception("could not record the publish failure of batch %s", batch_id)
+    finally:
+        release_batch_publish(batch_id)
+
+
+def start_batch_publish(batch_id: str, output_file_id: Optional[str]) -> None:
+    """
+    Queues publishing of a batch OpenAI has finished, unless another request
+    or worker already has it.
+    """
+    if not claim_batch_publish(batch_id):
+        return
+    # re-read under the claim: a publisher may have finished since our read
+    job = get_batch_job(batch_id)
+    if job is None or not _batch_is_pending(job):
+        release_batch_publish(batch_id)
+        return
+    # counted here, not on failure, so a worker killed mid-publish counts too
+    attempts = job.get("publish_attempts", 0)
+    if attempts >= BATCH_PUBLISH_MAX_ATTEMPTS:
+        store_batch_job(batch_id, {
+            **job,
+            "status": "failed",
+            "error": job.get("error") or f"publishing did not finish after {attempts} attempts",
+        })
+        release_batch_publish(batch_id)
+        return
+    job = {**job, "status": "publishing", "output_file_id": output_file_id, "publish_attempts": attempts + 1}
+    store_batch_job(batch_id, job)
+    run_job_executor.submit(_publish_batch_job, batch_id, job)
+
+
+def advance_blueprint_batch(batch_id: str, job: Dict[str, Any]) -> str:
+    """
+    One polling step for a batch without results: asks OpenAI where it is and
+    queues publishing once it has completed. Returns the status to report.
+    Shared by GET /batch/<id> and the background poller.
+    """
+    if job.get("status") == "publishing":
+        output_file_id = job.get("output_file_id")
+    else:
+        batch = get_openai_client().batches.retrieve(batch_id)
+        if batch.status != "completed":
+            if batch.status in _BATCH_DONE_STATUSES:
+                store_batch_job(batch_id, {**job, "status": batch.status})
+            return batch.status
+        output_file_id = batch.output_file_id
+
+    start_batch_publish(batch_id, output_file_id)
+    return "publishing"
+
+
+def poll_pending_batches() -> None:
+    for batch_id in pending_batch_ids():
+        job = get_batch_job(batch_id)
+        if job is None:
+            forget_pending_batch(batch_id)
+            continue
+        if not _batch_is_pending(job):
+            continue
+        try:
+            advance_blueprint_batch(batch_id, job)
+        except Exception:
+            # OpenAI/Redis hiccup: logged, and the next round retries
+            app.logger.exception("polling batch %s failed", batch_id)
+
+
+def _schedule_batch_poll() -> None:
+    timer = threading.Timer(BATCH_POLL_SECONDS, run_job_executor.submit, args=(_run_batch_poll,))
+    timer.daemon = True
+    timer.start()
+
+
+def _run_batch_poll() -> None:
+    try:
+        poll_pending_batches()
+    finally:
+        _schedule_batch_poll()
+
+
+_batch_poller_started = False
+
+
+@app.before_request
+def start_batch_poller() -> None:
+    """
+    Starts this worker's batch poller on its first request (threads started
+    at import would not survive gunicorn forking the workers).
+    """
+    global _batch_poller_started
+    if _batch_poller_started or BATCH_POLL_SECONDS <= 0:
+        return
+    with _RECORDS_LOCK:
+        if _batch_poller_started:
+            return
+        _batch_poller_started = True
+    _schedule_batch_poll()
+
+
+@app.route("/run_batch", methods=["POST"])
+def run_batch():
+    """
+    Queues many blueprints as one OpenAI Batch job (half the token price and
+    outside the sync rate limit). Poll GET /batch/<batch_id> for the results;
+    the background poller publishes them even if nobody polls.
+    """
+    if not S3_BUCKET:
+        return jsonify({"success": False, "error": "S3_BUCKET_NAME env var is not set"}), 500
+
+    data = request.get_json(force=True) or {}
+    items = data.get("requests")
+    if not isinstance(items, list) or not items:
+        return jsonify({"success": False, "error": "requests must be a non-empty list"}), 400
+    if JOB_STATE_NOT_SHARED:
+        return _job_state_not_shared_error()
+    if batch_store_full():
+        return jsonify({"success": False, "error": "too many unpublished batches, try again later"}), 503
+
+    batch_id = submit_blueprint_batch(items)
+    return jsonify({"success": True, "batch_id": batch_id, "count": len(items), "status_url": f"/batch/{batch_id}"}), 202
+
+
+@app.route("/batch/<batch_id>", methods=["GET"])
+def batch_status(batch_id: str):
+    job = get_batch_job(batch_id)
+    if job is None:
+        return jsonify({"success": False, "error": "unknown batch_id"}), 404
+    if job.get("results") is not None:
+        return jsonify({"success": True, "status": "completed", "results": job["results"]})
+
+    # Rendering every PDF is CPU-bound and slow for big batches, so it runs on
+    # run_job_executor; this request only reports where the batch is.
+    status = job["status"] if not _batch_is_pending(job) else advance_blueprint_batch(batch_id, job)
+    if status in _BATCH_DONE_STATUSES:
+        # same contract as /status/<job_id>: success is false once it can't finish
+        return jsonify({"success": False, "status": status, "error": job.get("error") or f"batch {status}"})
+    return jsonify({"success": True, "status": status})
 
 
 @app.route("/", methods=["GET"])